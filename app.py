@@ -8,15 +8,46 @@ except AttributeError:
     # This might fail in some environments (e.g., non-console)
     pass
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-import os, tempfile
+import orjson
+import io, os, tempfile
 from pathlib import Path
 import pandas as pd
 import traceback
 
+class OrjsonProvider(DefaultJSONProvider):
+    """Encodes jsonify() responses with orjson instead of the stdlib encoder"""
+    
+    # orjson always emits UTF-8, so non-ASCII is never escaped on either path
+    ensure_ascii = False
+    
+    def dumps(self, obj, **kwargs):
+        # Honour sort_keys and indent (orjson only indents by 2, which is what
+        # Flask's debug responses ask for); output is compact otherwise.
+        # Unsupported types still go through Flask's default() hook
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(
+                obj, default=kwargs.get('default', self.default), option=option
+            ).decode('utf-8')
+        except TypeError:
+            # orjson rejects what the stdlib encoder accepts, e.g. integers
+            # beyond 64 bits from a parsed JSON block
+            if not kwargs.get('indent'):
+                kwargs.setdefault('separators', (',', ':'))
+            return super().dumps(obj, **kwargs)
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)
+UPLOAD_CHUNK_SIZE = 64 * 1024
+STREAM_BATCH_ROWS = 500
 Path('inputs').mkdir(exist_ok=True)
 Path('outputs').mkdir(exist_ok=True)
 
@@ -48,6 +79,58 @@ def console_test():
     except FileNotFoundError:
         return "console_test.html not found", 404
 
+# Exact cell types that come out of the ladder below unchanged. Looking up
+# type(val) here skips the isinstance/pd.isna chain for the common cells;
+# subclasses, numpy scalars and pandas NA types still take the full ladder.
+_PASSTHROUGH_TYPES = frozenset({str, int, bool, list, tuple})
+
+def _json_value(val):
+    """Convert one DataFrame cell to a JSON-safe value"""
+    kind = type(val)
+    if kind in _PASSTHROUGH_TYPES:
+        return val
+    if val is None:
+        return None
+    if kind is float:
+        return None if val != val else val # NaN -> null
+    
+    # Handle lists/arrays first
+    if isinstance(val, (list, tuple)):
+        return val
+    # Check for NaN/NaT (which are not JSON-safe)
+    elif pd.isna(val):
+        return None # Convert to null
+    # Handle boolean explicitly
+    elif isinstance(val, bool):
+        return val
+    # Handle numeric types (int, float)
+    elif isinstance(val, (int, float)):
+        return val
+    # Convert all other types to string
+    else:
+        return str(val)
+
+def _stream_process_response(df, column_types):
+    """Yield the /process JSON body in batches of STREAM_BATCH_ROWS records"""
+    dumps = app.json.dumps
+    columns = list(df.columns)
+    
+    # The 200 status goes out with this first chunk, so no row may fail to
+    # encode: _json_value makes every cell JSON-safe and OrjsonProvider falls
+    # back to the stdlib encoder for anything orjson rejects
+    yield '{"data":['
+    separator = ''
+    batch = []
+    for row in df.itertuples(index=False, name=None):
+        batch.append(dumps({col: _json_value(val) for col, val in zip(columns, row)}))
+        if len(batch) == STREAM_BATCH_ROWS:
+            yield separator + ','.join(batch)
+            separator = ','
+            batch = []
+    if batch:
+        yield separator + ','.join(batch)
+    yield '],"success":true,"types":' + dumps(column_types) + '}\n'
+
 @app.route('/process', methods=['POST'])
 def process():
     """Main API endpoint for processing data"""
@@ -57,15 +140,21 @@ def process():
         # and it contains the import to the part of the code that needs it.
         from etl_pipeline import ETLPipeline
         
-        content = request.get_data(as_text=True)
-        if not content.strip():
-            return jsonify({'error': 'No data provided'}), 400
-        
-        # Write content to a temporary file with UTF-8 encoding
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', dir='inputs', delete=False, encoding='utf-8') as f:
-            f.write(content)
+        # Stream the request body into a temporary UTF-8 file in chunks rather
+        # than holding the whole payload in memory while the pipeline reads it
+        # back. Undecodable bytes are replaced, as request.get_data(as_text=True) did.
+        body = io.TextIOWrapper(request.stream, encoding='utf-8', errors='replace', newline='')
+        has_content = False
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', dir='inputs', delete=False, encoding='utf-8', newline='') as f:
+            for chunk in iter(lambda: body.read(UPLOAD_CHUNK_SIZE), ''):
+                f.write(chunk)
+                has_content = has_content or not chunk.isspace()
             fname = os.path.basename(f.name)
         
+        if not has_content:
+            os.remove(os.path.join('inputs', fname))
+            return jsonify({'error': 'No data provided'}), 400
+        
         print(f"DEBUG: Processing temporary file {fname}", flush=True)
         
         pipeline = ETLPipeline(input_dir='inputs', output_dir='outputs')
@@ -95,31 +184,6 @@ def process():
         
         print(f"DEBUG - Column types detected: {column_types}", flush=True)
         
-        # Convert DataFrame to a list of records (dicts) for JSON
-        # This handles NaN/NaT values correctly for JSON serialization
-        data = []
-        for _, row in df.iterrows():
-            record = {}
-            for col in df.columns:
-                val = row[col]
-                
-                # Handle lists/arrays first
-                if isinstance(val, (list, tuple)):
-                    record[col] = val
-                # Check for NaN/NaT (which are not JSON-safe)
-                elif pd.isna(val):
-                    record[col] = None # Convert to null
-                # Handle boolean explicitly
-                elif isinstance(val, bool):
-                    record[col] = val
-                # Handle numeric types (int, float)
-                elif isinstance(val, (int, float)):
-                    record[col] = val
-                # Convert all other types to string
-                else:
-                    record[col] = str(val)
-            data.append(record)
-        
         # Clean up the temporary file
         try:
             os.remove(os.path.join('inputs', fname))
@@ -127,12 +191,8 @@ def process():
         except Exception as e:
             print(f"WARNING: Could not remove temp file {fname}: {e}", flush=True)
         
-        # Return the complete response
-        return jsonify({
-            'success': True, 
-            'data': data,         # The processed data rows
-            'types': column_types # The inferred schema types
-        }), 200
+        # Stream the complete response record by record
+        return Response(_stream_process_response(df, column_types), mimetype='application/json')
         
     except Exception as e:
         print(f"ERROR in process(): {str(e)}", flush=True)
@@ -1,11 +1,13 @@
 import os
 import json
+import orjson
 import re
 import base64
 import pandas as pd
 import sqlite3
 from pathlib import Path
-from bs4 import BeautifulSoup
+from collections import Counter, defaultdict
+from lxml import etree, html as lxml_html
 from typing import Dict, List, Any, Tuple
 import mimetypes
 from datetime import datetime
@@ -19,6 +21,25 @@ if sys.stderr.encoding != 'utf-8':
     sys.stderr.reconfigure(encoding='utf-8', errors='replace')
 
 class ETLPipeline:
+    _JSON_DECODER = json.JSONDecoder()
+    # A JSON object opens with a key or closes empty; any other '{' (CSS, JS
+    # blocks) is skipped without handing it to the decoder
+    _JSON_OBJECT_START = re.compile(r'\{[ \t\n\r]*["}]')
+
+    # Compiled once per process; each HTML pattern is scanned separately since
+    # their matches overlap (a <div> inside <body>)
+    _HTML_PATTERNS = [
+        re.compile(pattern, re.DOTALL | re.IGNORECASE) for pattern in (
+            r'<html[^>]*>.*?</html>',
+            r'<!DOCTYPE[^>]*>.*?</html>',
+            r'<div[^>]*>.*?</div>',
+            r'<p[^>]*>.*?</p>',
+            r'<body[^>]*>.*?</body>',
+        )
+    ]
+    _DATA_URI_PATTERN = re.compile(r'data:(?:image|text)/[^;]+;base64,([A-Za-z0-9+/=]+)')
+    _BASE64_PATTERN = re.compile(r'[A-Za-z0-9+/]{64,}={0,2}')  # Generic base64 strings
+
     def __init__(self, input_dir="inputs", output_dir="outputs", use_db=False):
         self.input_dir = Path(input_dir)
         self.output_dir = Path(output_dir)
@@ -32,7 +53,7 @@ class ETLPipeline:
             'end_time': None,
             'filename': None,
             'total_items': 0,
-            'items_by_type': {}
+            'items_by_type': Counter()
         }
         
         if use_db:
@@ -44,15 +65,20 @@ class ETLPipeline:
         if not filepath.exists():
             raise FileNotFoundError(f"File not found: {filepath}")
         
+        # Decode as UTF-8, falling back to latin-1
+        raw = filepath.read_bytes()
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                return f.read()
+            content = raw.decode('utf-8')
         except UnicodeDecodeError:
             try:
-                with open(filepath, 'r', encoding='latin-1') as f:
-                    return f.read()
+                content = raw.decode('latin-1')
             except Exception as e:
                 raise ValueError(f"Cannot read file with available encodings: {str(e)}")
+        
+        # Same newline translation as text-mode open()
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+        return content
     
     def detect_content_types(self, content: str) -> Dict[str, List[str]]:
         """Detect different content types in the mixed file"""
@@ -64,64 +90,81 @@ class ETLPipeline:
         }
         
         # Detect HTML blocks - more comprehensive patterns
-        html_patterns = [
-            r'<html[^>]*>.*?</html>',
-            r'<!DOCTYPE[^>]*>.*?</html>',
-            r'<div[^>]*>.*?</div>',
-            r'<p[^>]*>.*?</p>',
-            r'<body[^>]*>.*?</body>'
-        ]
-        for pattern in html_patterns:
-            html_matches = re.findall(pattern, content, re.DOTALL | re.IGNORECASE)
-            detected['html'].extend(html_matches)
+        # (plain text/JSON inputs with no tags at all skip the regex passes)
+        consumed_spans = []
+        if '<' in content:
+            for pattern in self._HTML_PATTERNS:
+                for match in pattern.finditer(content):
+                    detected['html'].append(match.group())
+                    consumed_spans.append(match.span())
         
         # Remove duplicates
         detected['html'] = list(set(detected['html']))
         
-        # Detect JSON blocks - improved pattern
-        json_pattern = r'\{(?:[^{}]|(?:\{[^{}]*\}))*\}'
-        json_matches = re.findall(json_pattern, content, re.DOTALL)
-        for match in json_matches:
+        # Detect JSON blocks - decode from each candidate '{', so objects
+        # nested at any depth are picked up whole
+        seen_json = set()
+        # Local aliases: this loop runs once per candidate '{' in the input
+        search = self._JSON_OBJECT_START.search
+        raw_decode = self._JSON_DECODER.raw_decode
+        add_span = consumed_spans.append
+        add_json = detected['json'].append
+        pos = 0
+        while True:
+            candidate = search(content, pos)
+            if candidate is None:
+                break
+            start = candidate.start()
             try:
-                json.loads(match)
-                if match not in detected['json']:
-                    detected['json'].append(match)
-            except:
-                pass
+                _, end = raw_decode(content, start)
+            except (ValueError, RecursionError):
+                # RecursionError: nesting deeper than the decoder can follow
+                pos = start + 1
+                continue
+            add_span((start, end))
+            match = content[start:end]
+            if match not in seen_json:
+                seen_json.add(match)
+                add_json(match)
+            pos = end
         
         # Detect base64 encoded data
-        base64_patterns = [
-            r'data:image/[^;]+;base64,([A-Za-z0-9+/=]+)',
-            r'data:text/[^;]+;base64,([A-Za-z0-9+/=]+)',
-            r'([A-Za-z0-9+/]{64,}={0,2})'  # Generic base64 strings
-        ]
-        for pattern in base64_patterns:
-            base64_matches = re.findall(pattern, content)
-            detected['base64'].extend(base64_matches)
+        detected['base64'].extend(self._DATA_URI_PATTERN.findall(content))
+        detected['base64'].extend(self._BASE64_PATTERN.findall(content))
         
         detected['base64'] = list(set(detected['base64']))
         
         # Extract plain text (everything else)
-        remaining_text = content
-        for html in detected['html']:
-            remaining_text = remaining_text.replace(html, '')
-        for json_str in detected['json']:
-            remaining_text = remaining_text.replace(json_str, '')
+        pieces = []
+        pos = 0
+        for start, end in sorted(consumed_spans):
+            if start > pos:
+                pieces.append(content[pos:start])
+            pos = max(pos, end)
+        pieces.append(content[pos:])
+        remaining_text = ''.join(pieces)
         
         # Split into paragraphs
-        paragraphs = [p.strip() for p in remaining_text.split('\n') if p.strip() and len(p.strip()) > 5]
+        paragraphs = [p for p in map(str.strip, remaining_text.split('\n')) if len(p) > 5]
         detected['text'] = paragraphs
         
         return detected
     
     def extract_html(self, html_string: str) -> Dict[str, Any]:
         """Extract data from HTML - only keep: type, title, word_count"""
-        soup = BeautifulSoup(html_string, 'html.parser')
+        try:
+            root = lxml_html.document_fromstring(html_string)
+        except etree.ParserError:
+            # Blank input or markup with no elements (only a doctype/comments)
+            return {'type': 'html', 'title': '', 'word_count': 0}
+        title = root.find('.//title')
+        # Script/style bodies are not visible text
+        etree.strip_elements(root, 'script', 'style', with_tail=False)
         
         return {
             'type': 'html',
-            'title': soup.title.string if soup.title else '',
-            'word_count': len(soup.get_text().split())
+            'title': title.text if title is not None else '',
+            'word_count': len(root.text_content().split())
         }
     
     def extract_json(self, json_string: str) -> Dict[str, Any]:
@@ -138,17 +181,24 @@ class ETLPipeline:
     
     def flatten_dict(self, d: Dict, parent_key: str = '', sep: str = '_') -> Dict:
         """Flatten nested dictionary - preserves arrays and primitives"""
-        items = []
-        for k, v in d.items():
-            new_key = f"{parent_key}{sep}{k}" if parent_key else k
-            if isinstance(v, dict):
-                items.extend(self.flatten_dict(v, new_key, sep=sep).items())
-            elif isinstance(v, list):
+        # Walk the nesting with an explicit stack of (prefix, items iterator)
+        # so every leaf is written straight into one dict, in the same
+        # depth-first order recursion would visit it, with no per-level dicts
+        flat = {}
+        stack = [(parent_key, iter(d.items()))]
+        while stack:
+            prefix, items = stack[-1]
+            for k, v in items:
+                new_key = f"{prefix}{sep}{k}" if prefix else k
+                if isinstance(v, dict):
+                    # Descend; this level resumes from its iterator afterwards
+                    stack.append((new_key, iter(v.items())))
+                    break
                 # Keep arrays as lists, don't convert to JSON string
-                items.append((new_key, v))
+                flat[new_key] = v
             else:
-                items.append((new_key, v))
-        return dict(items)
+                stack.pop()
+        return flat
     
     def extract_text(self, text: str) -> Dict[str, Any]:
         """Extract data from plain text - only keep: type, title, word_count"""
@@ -196,26 +246,37 @@ class ETLPipeline:
     
     def infer_schema(self):
         """Step 3: Build dynamic schema from extracted data"""
-        all_keys = set()
+        # Gather every key's stats in one pass
+        present_in = defaultdict(int)
+        has_none = defaultdict(bool)
+        value_types = defaultdict(set)
         for item in self.extracted_data:
-            all_keys.update(item.keys())
-        
-        # Build schema with type inference
-        for key in all_keys:
-            values = [item.get(key) for item in self.extracted_data if key in item]
-            value_types = set(type(v).__name__ for v in values if v is not None)
-            
+            for key, value in item.items():
+                present_in[key] += 1
+                if value is None:
+                    has_none[key] = True
+                else:
+                    value_types[key].add(type(value).__name__)
+        
+        # Build schema with type inference; a key missing from some items
+        # counts as nullable. Type names are sorted so the schema is stable
+        # between runs
+        total_items = len(self.extracted_data)
+        for key, count in present_in.items():
+            types = value_types.get(key)
             self.schema[key] = {
-                'type': list(value_types) if value_types else ['NoneType'],
-                'nullable': any(v is None for v in [item.get(key) for item in self.extracted_data]),
-                'present_in': sum(1 for item in self.extracted_data if key in item)
+                'type': sorted(types) if types else ['NoneType'],
+                'nullable': has_none[key] or count < total_items,
+                'present_in': count
             }
         
-        # Fill missing values with None
+        # Fill missing values with None (items that already have every key are skipped)
+        all_keys = present_in.keys()
         for item in self.extracted_data:
-            for key in all_keys:
-                if key not in item:
-                    item[key] = None
+            if len(item) < len(all_keys):
+                for key in all_keys:
+                    if key not in item:
+                        item[key] = None
     
     def normalize(self) -> pd.DataFrame:
         """Step 4: Normalize data into DataFrame with total_items
@@ -223,33 +284,31 @@ class ETLPipeline:
         Key Strategy: Keep record types separate in their own row groups to avoid
         polluting HTML/Text records with JSON fields when mixed content is processed.
         """
-        # Remove word_count and title from all records - they're extraction artifacts
-        cleaned_data = []
-        for record in self.extracted_data:
-            cleaned = {k: v for k, v in record.items() if k not in ['word_count', 'title']}
-            cleaned_data.append(cleaned)
+        # Nothing extracted: skip grouping and frame building entirely
+        if not self.extracted_data:
+            return pd.DataFrame()
         
-        # Group by type to keep fields separate
-        grouped_by_type = {}
-        for record in cleaned_data:
-            record_type = record.get('type', 'unknown')
-            if record_type not in grouped_by_type:
-                grouped_by_type[record_type] = []
-            grouped_by_type[record_type].append(record)
+        # Group by type to keep fields separate (only the exported types)
+        grouped_by_type = {record_type: [] for record_type in ['html', 'json', 'text', 'media']}
+        for record in self.extracted_data:
+            group = grouped_by_type.get(record.get('type', 'unknown'))
+            if group is not None:
+                group.append(record)
         
         # Build DataFrame with type-specific columns
         all_rows = []
-        for record_type in ['html', 'json', 'text', 'media']:  # Process in order
-            if record_type not in grouped_by_type:
+        for type_records in grouped_by_type.values():  # Process in order
+            if not type_records:
                 continue
             
-            type_records = grouped_by_type[record_type]
             type_df = pd.DataFrame(type_records)
             
             # Only include type-specific fields + core fields
             # For each type, keep only the columns that actually have data
+            # (word_count and title are extraction artifacts)
             core_fields = ['type', 'source_index']
-            type_specific = [col for col in type_df.columns if col not in core_fields]
+            type_specific = [col for col in type_df.columns
+                             if col not in core_fields and col not in ('word_count', 'title')]
             
             # Reorder columns: core first, then type-specific
             cols_to_keep = core_fields + type_specific
@@ -276,11 +335,6 @@ class ETLPipeline:
         final_cols = core_order + sorted(other_cols)
         df = df[final_cols]
         
-        # Ensure numeric columns stay numeric
-        for col in ['total_items']:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
-        
         return df
     
     def load(self, df: pd.DataFrame, output_csv="cleaned_output.csv", 
@@ -293,16 +347,14 @@ class ETLPipeline:
         
         # Save schema
         schema_path = self.output_dir / schema_json
-        with open(schema_path, 'w') as f:
-            json.dump(self.schema, f, indent=2)
+        schema_path.write_bytes(orjson.dumps(self.schema, option=orjson.OPT_INDENT_2))
         print(f"Saved schema to: {schema_path}")
         
         # Save metadata
         metadata_path = self.output_dir / "processing_metadata.json"
         self.processing_metadata['end_time'] = datetime.now().isoformat()
         self.processing_metadata['total_items'] = len(df)
-        with open(metadata_path, 'w') as f:
-            json.dump(self.processing_metadata, f, indent=2)
+        metadata_path.write_bytes(orjson.dumps(self.processing_metadata, option=orjson.OPT_INDENT_2))
         print(f"Saved metadata to: {metadata_path}")
         
         # Save to SQLite if enabled
@@ -355,23 +407,23 @@ class ETLPipeline:
             conn = sqlite3.connect(str(self.db_path))
             cursor = conn.cursor()
             
-            # Insert data
-            for _, row in df.iterrows():
-                data_json = json.dumps(row.to_dict())
-                data_type = row.get('type', 'unknown')
-                source_index = row.get('source_index', '')
-                
-                cursor.execute('''
-                    INSERT INTO processed_data (filename, source_index, data_type, data_json)
-                    VALUES (?, ?, ?, ?)
-                ''', (self.processing_metadata['filename'], source_index, data_type, data_json))
+            # Insert data in one batch
+            filename = self.processing_metadata['filename']
+            rows = (
+                (filename, row.get('source_index', ''), row.get('type', 'unknown'), json.dumps(row))
+                for row in df.to_dict(orient='records')
+            )
+            cursor.executemany('''
+                INSERT INTO processed_data (filename, source_index, data_type, data_json)
+                VALUES (?, ?, ?, ?)
+            ''', rows)
             
             # Insert schema
             schema_json = json.dumps(self.schema)
             cursor.execute('''
                 INSERT INTO schemas (filename, schema_json)
                 VALUES (?, ?)
-            ''', (self.processing_metadata['filename'], schema_json))
+            ''', (filename, schema_json))
             
             conn.commit()
             conn.close()
@@ -399,10 +451,9 @@ class ETLPipeline:
             print(f"   Extracted {len(self.extracted_data)} items")
             
             # Track items by type
-            for item in self.extracted_data:
-                item_type = item.get('type', 'unknown')
-                self.processing_metadata['items_by_type'][item_type] = \
-                    self.processing_metadata['items_by_type'].get(item_type, 0) + 1
+            self.processing_metadata['items_by_type'].update(
+                item.get('type', 'unknown') for item in self.extracted_data
+            )
             
             # Step 3: Infer Schema
             print("\n[3] Inferring schema...")
@@ -147,7 +147,7 @@ def view_outputs():
     metadata_file = output_path / "processing_metadata.json"
     if metadata_file.exists():
         import json
-        with open(metadata_file, 'r') as f:
+        with open(metadata_file, 'r', encoding='utf-8') as f:
             metadata = json.load(f)
         print(f"\nLatest Processing Info:")
         print(f"   - File: {metadata.get('filename')}")